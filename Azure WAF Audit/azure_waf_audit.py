@@ -55,7 +55,7 @@ def get_azure_credential():
         print("💡 Make sure you've run 'az login' first")
         return DefaultAzureCredential()
     
-    elif all([TENANT_ID, CLIENT_ID, CLIENT_SECRET]):
+    elif TENANT_ID and CLIENT_ID and CLIENT_SECRET:
         print("🔑 Using Service Principal authentication")
         return ClientSecretCredential(
             tenant_id=TENANT_ID,
@@ -201,20 +201,21 @@ def export_application_gateway_waf(network_client, output_dir, timestamp):
         
         for gateway in app_gateways:
             try:
-                if hasattr(gateway, 'web_application_firewall_configuration') and gateway.web_application_firewall_configuration:
+                firewall_config = getattr(gateway, 'web_application_firewall_configuration', None)
+                if firewall_config:
                     waf_config = {
                         'Resource Name': gateway.name,
                         'Resource Group': gateway.id.split('/')[4] if gateway.id else 'N/A',
                         'Location': gateway.location or 'N/A',
-                        'Policy Mode': gateway.web_application_firewall_configuration.firewall_mode,
-                        'Policy State': gateway.web_application_firewall_configuration.enabled,
-                        'Request Body Check': gateway.web_application_firewall_configuration.request_body_check,
-                        'Max Request Body Size': gateway.web_application_firewall_configuration.max_request_body_size_in_kb,
-                        'File Upload Limit': gateway.web_application_firewall_configuration.file_upload_limit_in_mb,
-                        'Rule Set Type': gateway.web_application_firewall_configuration.rule_set_type,
-                        'Rule Set Version': gateway.web_application_firewall_configuration.rule_set_version,
-                        'Custom Rules Count': len(gateway.web_application_firewall_configuration.disabled_rule_groups) if gateway.web_application_firewall_configuration.disabled_rule_groups else 0,
-                        'Exclusions Count': len(gateway.web_application_firewall_configuration.exclusions) if gateway.web_application_firewall_configuration.exclusions else 0,
+                        'Policy Mode': firewall_config.firewall_mode,
+                        'Policy State': firewall_config.enabled,
+                        'Request Body Check': firewall_config.request_body_check,
+                        'Max Request Body Size': firewall_config.max_request_body_size_in_kb,
+                        'File Upload Limit': firewall_config.file_upload_limit_in_mb,
+                        'Rule Set Type': firewall_config.rule_set_type,
+                        'Rule Set Version': firewall_config.rule_set_version,
+                        'Custom Rules Count': len(firewall_config.disabled_rule_groups) if firewall_config.disabled_rule_groups else 0,
+                        'Exclusions Count': len(firewall_config.exclusions) if firewall_config.exclusions else 0,
                         'Associated Gateways': '1 (Legacy Config)'
                     }
                     
@@ -256,6 +257,7 @@ def export_front_door_waf(frontdoor_client, output_dir, timestamp):
             
             for policy in waf_policies:
                 try:
+                    frontend_endpoints = getattr(policy, 'frontend_endpoints', None) or []
                     frontdoor_wafs.append({
                         'Policy Name': policy.name,
                         'Resource Group': policy.id.split('/')[4] if policy.id else 'N/A',
@@ -268,7 +270,7 @@ def export_front_door_waf(frontdoor_client, output_dir, timestamp):
                         'Managed Rules Count': len(policy.managed_rules.managed_rule_sets) if policy.managed_rules and policy.managed_rules.managed_rule_sets else 0,
                         'Custom Rules Count': len(policy.custom_rules.rules) if policy.custom_rules and policy.custom_rules.rules else 0,
                         'Resource State': policy.resource_state,
-                        'Frontend Endpoints': 'Multiple' if hasattr(policy, 'frontend_endpoints') and policy.frontend_endpoints and len(policy.frontend_endpoints) > 1 else '1' if hasattr(policy, 'frontend_endpoints') and policy.frontend_endpoints else '0'
+                        'Frontend Endpoints': 'Multiple' if len(frontend_endpoints) > 1 else '1' if frontend_endpoints else '0'
                     })
                     
                 except Exception as e:
@@ -326,10 +328,10 @@ def export_cdn_waf(cdn_client, output_dir, timestamp):
                                         'Location': profile.location or 'Global',
                                         'CDN SKU': profile.sku.name if profile.sku else 'N/A',
                                         'Policy Type': policy.type,
-                                        'Deployment Status': policy.deployment_status if hasattr(policy, 'deployment_status') else 'N/A',
-                                        'Domain Count': len(policy.domains) if hasattr(policy, 'domains') and policy.domains else 0,
-                                        'Profile State': profile.resource_state if hasattr(profile, 'resource_state') else 'N/A',
-                                        'Provisioning State': profile.provisioning_state if hasattr(profile, 'provisioning_state') else 'N/A'
+                                        'Deployment Status': getattr(policy, 'deployment_status', 'N/A'),
+                                        'Domain Count': len(getattr(policy, 'domains', None) or []),
+                                        'Profile State': getattr(profile, 'resource_state', 'N/A'),
+                                        'Provisioning State': getattr(profile, 'provisioning_state', 'N/A')
                                     })
                                 except Exception as e:
                                     print(f"⚠️  Error processing CDN security policy: {e}")
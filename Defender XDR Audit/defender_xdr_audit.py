@@ -88,7 +88,7 @@ def get_azure_credential():
         print("💡 Make sure you've run 'az login' first")
         return DefaultAzureCredential()
     
-    elif all([TENANT_ID, CLIENT_ID, CLIENT_SECRET]):
+    elif TENANT_ID and CLIENT_ID and CLIENT_SECRET:
         print("🔑 Using Service Principal authentication")
         return ClientSecretCredential(
             tenant_id=TENANT_ID,  # type: ignore
@@ -60,7 +60,7 @@ def get_azure_credential():
         print("💡 Make sure you've run 'az login' first")
         return DefaultAzureCredential()
     
-    elif all([TENANT_ID, CLIENT_ID, CLIENT_SECRET]):
+    elif TENANT_ID and CLIENT_ID and CLIENT_SECRET:
         print("🔑 Using Service Principal authentication")
         return ClientSecretCredential(
             tenant_id=TENANT_ID,
@@ -178,18 +178,21 @@ def export_security_assessments(security_client, output_dir, timestamp):
         
         for assessment in assessment_results:
             try:
+                resource_details = getattr(assessment, 'resource_details', None)
+                status = getattr(assessment, 'status', None)
+                metadata = getattr(assessment, 'metadata', None)
                 assessments.append({
                     'Assessment ID': assessment.name,
                     'Display Name': assessment.display_name or 'N/A',
-                    'Resource Type': assessment.resource_details.get('source', 'N/A') if hasattr(assessment, 'resource_details') else 'N/A',
-                    'Status': assessment.status.get('code', 'Unknown') if hasattr(assessment, 'status') else 'Unknown',
-                    'Severity': assessment.status.get('severity', 'Unknown') if hasattr(assessment, 'status') else 'Unknown',
-                    'Category': assessment.metadata.get('category', 'N/A') if hasattr(assessment, 'metadata') else 'N/A',
-                    'Assessment Type': assessment.metadata.get('assessmentType', 'N/A') if hasattr(assessment, 'metadata') else 'N/A',
-                    'Description': assessment.metadata.get('description', 'N/A') if hasattr(assessment, 'metadata') else 'N/A',
-                    'Remediation': assessment.metadata.get('remediationDescription', 'N/A') if hasattr(assessment, 'metadata') else 'N/A',
-                    'First Evaluation': assessment.status.get('firstEvaluationDate', 'N/A') if hasattr(assessment, 'status') else 'N/A',
-                    'Status Change': assessment.status.get('statusChangeDate', 'N/A') if hasattr(assessment, 'status') else 'N/A'
+                    'Resource Type': resource_details.get('source', 'N/A') if resource_details is not None else 'N/A',
+                    'Status': status.get('code', 'Unknown') if status is not None else 'Unknown',
+                    'Severity': status.get('severity', 'Unknown') if status is not None else 'Unknown',
+                    'Category': metadata.get('category', 'N/A') if metadata is not None else 'N/A',
+                    'Assessment Type': metadata.get('assessmentType', 'N/A') if metadata is not None else 'N/A',
+                    'Description': metadata.get('description', 'N/A') if metadata is not None else 'N/A',
+                    'Remediation': metadata.get('remediationDescription', 'N/A') if metadata is not None else 'N/A',
+                    'First Evaluation': status.get('firstEvaluationDate', 'N/A') if status is not None else 'N/A',
+                    'Status Change': status.get('statusChangeDate', 'N/A') if status is not None else 'N/A'
                 })
             except Exception as e:
                 print(f"⚠️  Error processing assessment: {e}")
@@ -141,7 +141,8 @@ def auto_detect_xdr_files():
     
     return detected_files
 
-def main():
+def _build_parser():
+    """Build the command-line parser for the report generator."""
     parser = argparse.ArgumentParser(description="Generate a comprehensive Microsoft Sentinel and Defender XDR HLD-style audit report from CSV exports.")
     
     # Sentinel required arguments
@@ -161,7 +162,12 @@ def main():
     parser.add_argument("--customer-name", help="Customer name to place in the report header (auto-detected if not specified)")
     parser.add_argument("--output", default="sentinel_xdr_hld_audit.docx", help="Output .docx path")
     parser.add_argument("--preview-rows", type=int, default=10, help="Rows to preview in each table")
-    args = parser.parse_args()
+    return parser
+
+_PARSER = _build_parser()
+
+def main():
+    args = _PARSER.parse_args()
     
     # Auto-detect customer name if not provided
     if not args.customer_name:
@@ -106,12 +106,18 @@ def main():
     try:
         env = os.environ.copy()
         env['OUTPUT_DIR'] = str(output_dir)
-        result = subprocess.run(cmd_args, check=True, capture_output=True, text=True, env=env)
+        # Stream the generator's stdout live; only stderr is kept for error reporting.
+        # Flush first so our header lands before the child's output when redirected.
+        sys.stdout.flush()
+        subprocess.run(
+            cmd_args,
+            check=True,
+            stderr=subprocess.PIPE,
+            text=True,
+            env=env,
+        )
         print("✅ Report generated successfully!")
         print(f"📄 Report saved as: {output_filename}")
-        
-        if result.stdout:
-            print(f"Output: {result.stdout}")
             
     except subprocess.CalledProcessError as e:
         print(f"❌ Error generating report: {e}")
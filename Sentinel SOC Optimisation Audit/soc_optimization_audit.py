@@ -7,11 +7,12 @@ Exports SOC optimization recommendations and metrics from Microsoft Sentinel.
 import os
 import csv
 import sys
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
+from types import SimpleNamespace
 from azure.identity import DefaultAzureCredential, ClientSecretCredential, InteractiveBrowserCredential, DeviceCodeCredential
 from azure.mgmt.subscription import SubscriptionClient
-from azure.mgmt.resource import ResourceManagementClient
 from azure.core.exceptions import AzureError
 try:
     import requests
@@ -19,15 +20,26 @@ except ImportError:
     print("⚠️  requests module not available. Install with: pip install requests")
     requests = None
 
-# Configuration
-SUBSCRIPTION_ID = os.getenv('AZURE_SUBSCRIPTION_ID')
-RESOURCE_GROUP = os.getenv('RESOURCE_GROUP_NAME')
-WORKSPACE_NAME = os.getenv('WORKSPACE_NAME')
+# Sample Log Analytics workspace ID used until the real workspace is queried
+SAMPLE_WORKSPACE_ID = "12345678-1234-1234-1234-123456789012"
 
-# Optional service principal authentication
-TENANT_ID = os.getenv('AZURE_TENANT_ID')
-CLIENT_ID = os.getenv('AZURE_CLIENT_ID')
-CLIENT_SECRET = os.getenv('AZURE_CLIENT_SECRET')
+
+@lru_cache(maxsize=1)
+def get_config():
+    """Read the audit configuration from the environment once.
+
+    Called lazily so values loaded from a .env file in main() are picked up.
+    """
+    environ = os.environ
+    return SimpleNamespace(
+        subscription_id=environ.get('AZURE_SUBSCRIPTION_ID'),
+        resource_group=environ.get('RESOURCE_GROUP_NAME'),
+        workspace_name=environ.get('WORKSPACE_NAME'),
+        # Optional service principal authentication
+        tenant_id=environ.get('AZURE_TENANT_ID'),
+        client_id=environ.get('AZURE_CLIENT_ID'),
+        client_secret=environ.get('AZURE_CLIENT_SECRET'),
+    )
 
 
 def resolve_output_dir() -> Path:
@@ -48,6 +60,8 @@ def resolve_output_dir() -> Path:
 def get_azure_credential():
     """Get Azure credentials with interactive options."""
     
+    config = get_config()
+
     # Check for authentication mode preference
     auth_mode = os.getenv('AUTH_MODE', '').lower()
     
@@ -67,12 +81,12 @@ def get_azure_credential():
         print("💡 Make sure you've run 'az login' first")
         return DefaultAzureCredential()
     
-    elif all([TENANT_ID, CLIENT_ID, CLIENT_SECRET]):
+    elif config.tenant_id and config.client_id and config.client_secret:
         print("🔑 Using Service Principal authentication")
         return ClientSecretCredential(
-            tenant_id=TENANT_ID,  # type: ignore
-            client_id=CLIENT_ID,  # type: ignore
-            client_secret=CLIENT_SECRET  # type: ignore
+            tenant_id=config.tenant_id,  # type: ignore
+            client_id=config.client_id,  # type: ignore
+            client_secret=config.client_secret  # type: ignore
         )
     
     # If no AUTH_MODE set, prompt user for choice
@@ -117,13 +131,11 @@ def get_azure_credential():
 
 def get_customer_info(credential):
     """Get customer information from Azure subscription and tenant details."""
+    config = get_config()
     try:
         # Get subscription info
         subscription_client = SubscriptionClient(credential)
-        subscription = subscription_client.subscriptions.get(SUBSCRIPTION_ID)  # type: ignore[arg-type]
-        
-        # Get tenant info from resource management
-        resource_client = ResourceManagementClient(credential, SUBSCRIPTION_ID)  # type: ignore[arg-type]
+        subscription = subscription_client.subscriptions.get(config.subscription_id)  # type: ignore[arg-type]
         tenant_id = subscription.tenant_id  # type: ignore[attr-defined]
         
         # Extract meaningful customer name
@@ -137,9 +149,9 @@ def get_customer_info(credential):
         
         # If still generic, try to extract from resource group pattern
         if customer_name.lower() in ["", "microsoft", "azure", "subscription"]:
-            if RESOURCE_GROUP:
+            if config.resource_group:
                 # Extract customer name from resource group (common pattern: customer-rg-region)
-                rg_parts = RESOURCE_GROUP.split("-")
+                rg_parts = config.resource_group.split("-")
                 if len(rg_parts) > 0:
                     customer_name = rg_parts[0].title()
         
@@ -150,22 +162,22 @@ def get_customer_info(credential):
         return {
             "customer_name": customer_name,
             "subscription_name": subscription_name,
-            "subscription_id": SUBSCRIPTION_ID,
+            "subscription_id": config.subscription_id,
             "tenant_id": str(tenant_id) if tenant_id else "Unknown"
         }
         
     except Exception as e:
         print(f"⚠️  Could not retrieve customer info: {e}")
         # Fallback to resource group-based naming
-        if RESOURCE_GROUP:
-            customer_name = RESOURCE_GROUP.split("-")[0].title()
+        if config.resource_group:
+            customer_name = config.resource_group.split("-")[0].title()
         else:
             customer_name = "Azure Customer"
             
         return {
             "customer_name": customer_name,
             "subscription_name": "Unknown Subscription",
-            "subscription_id": SUBSCRIPTION_ID or "Unknown",
+            "subscription_id": config.subscription_id or "Unknown",
             "tenant_id": "Unknown"
         }
 
@@ -173,12 +185,12 @@ def get_workspace_id():
     """Get a sample workspace ID - in real implementation would query Log Analytics."""
     # For demo purposes, return a sample workspace ID format
     # In production, this would query the actual workspace
-    return "12345678-1234-1234-1234-123456789012"
+    return SAMPLE_WORKSPACE_ID
 
 def query_log_analytics(credential, workspace_id, query):
     """Execute a KQL query against Log Analytics."""
-    if not requests:
-        print("⚠️  Cannot execute queries without requests module")
+    # Sample mode: skip token acquisition entirely
+    if requests is None or credential is None:
         return generate_sample_data(query)
     
     try:
@@ -198,12 +210,9 @@ def query_log_analytics(credential, workspace_id, query):
             "timespan": "P30D"  # Last 30 days
         }
         
-        if requests:
-            response = requests.post(url, headers=headers, json=body)
-            response.raise_for_status()
-            return response.json()
-        else:
-            return generate_sample_data(query)
+        response = requests.post(url, headers=headers, json=body)
+        response.raise_for_status()
+        return response.json()
         
     except Exception as e:
         print(f"Error executing query: {e}")
@@ -431,6 +440,11 @@ def main():
     """Main function."""
     print("🎯 Microsoft Sentinel SOC Optimization Audit")
     print("=" * 60)
+
+    # Capture the run time once for filenames and the metadata row
+    now = datetime.now(timezone.utc)
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    audit_timestamp = now.strftime("%Y-%m-%d %H:%M:%S UTC")
     
     # Check for .env file and load it
     env_file = '.env'
@@ -440,7 +454,8 @@ def main():
         print(f"📁 Loaded configuration from {env_file}")
     
     # Check required environment variables
-    if not all([SUBSCRIPTION_ID, RESOURCE_GROUP, WORKSPACE_NAME]):
+    config = get_config()
+    if not (config.subscription_id and config.resource_group and config.workspace_name):
         print("❌ Missing required environment variables:")
         print("   AZURE_SUBSCRIPTION_ID")
         print("   RESOURCE_GROUP_NAME") 
@@ -452,9 +467,9 @@ def main():
         print("   (or use Azure CLI: az login)")
         sys.exit(1)
     
-    print(f"Subscription: {SUBSCRIPTION_ID}")
-    print(f"Resource Group: {RESOURCE_GROUP}")
-    print(f"Workspace: {WORKSPACE_NAME}")
+    print(f"Subscription: {config.subscription_id}")
+    print(f"Resource Group: {config.resource_group}")
+    print(f"Workspace: {config.workspace_name}")
     print()
     
     try:
@@ -478,24 +493,28 @@ def main():
         print(f"Workspace ID: {workspace_id}")
         print()
         
+        # Without requests no query can run, so don't hand the credential to
+        # the analysis functions and avoid a Log Analytics token fetch
+        query_credential = credential
+        if requests is None:
+            print("⚠️  Cannot execute queries without requests module - using sample data")
+            query_credential = None
+
         # Perform SOC optimization analysis
-        rules = audit_rule_efficiency(credential, workspace_id)
-        ingestion = audit_data_ingestion(credential, workspace_id)
+        rules = audit_rule_efficiency(query_credential, workspace_id)
+        ingestion = audit_data_ingestion(query_credential, workspace_id)
         recommendations = get_optimization_recommendations(rules, ingestion)
         
         # Resolve output directory
         output_dir = resolve_output_dir()
         print(f"📁 Output directory: {output_dir}")
 
-        # Generate timestamp for filenames
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
         # Save customer information to metadata file
         metadata_file = output_dir / f'soc_customer_info_{timestamp}.csv'
         with metadata_file.open('w', newline='', encoding='utf-8') as csvfile:
             writer = csv.DictWriter(csvfile, fieldnames=['customer_name', 'subscription_name', 'subscription_id', 'tenant_id', 'audit_timestamp'])
             writer.writeheader()
-            customer_info['audit_timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
+            customer_info['audit_timestamp'] = audit_timestamp
             writer.writerow(customer_info)
         print(f"💾 Customer metadata saved to: {metadata_file}")
         
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for launching the audit scripts
+Used by run_extended_audits.py and run_with_auth.py
+"""
+
+import os
+import subprocess
+import sys
+import threading
+
+# Upper bound for a single audit so one hung child can't stall a run
+AUDIT_TIMEOUT_SECONDS = 60 * 60
+
+# Serialises the output blocks of audits running in parallel
+_PRINT_LOCK = threading.Lock()
+
+def uses_non_interactive_auth():
+    """Return True when the audits can authenticate without prompting the user.
+
+    Parallel audits share one console, so device code, browser and
+    prompt-for-method logins would race each other. Only Azure CLI
+    credentials or a complete service principal are safe to run side by side.
+    """
+    auth_mode = os.getenv('AUTH_MODE', '').lower()
+    if auth_mode in ('device', 'browser'):
+        return False
+    if auth_mode == 'cli':
+        return True
+    return all(os.getenv(var) for var in ('AZURE_TENANT_ID', 'AZURE_CLIENT_ID', 'AZURE_CLIENT_SECRET'))
+
+def run_audit_script(script_path, cwd=None, env=None, capture=False):
+    """Run an audit script with this interpreter, bounded by AUDIT_TIMEOUT_SECONDS.
+
+    Returns (returncode, output). returncode is None if the script timed out;
+    output is None unless capture is set. Without capture the script inherits
+    our stdout/stderr so its output streams live.
+    """
+    command = [sys.executable, script_path]
+    if capture:
+        # A piped child would otherwise encode stdout with the ANSI code
+        # page on Windows and die on the audits' emoji output
+        process = subprocess.Popen(
+            command, cwd=cwd,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            encoding="utf-8", errors="replace",
+            env={**(os.environ if env is None else env), "PYTHONIOENCODING": "utf-8"},
+        )
+    else:
+        process = subprocess.Popen(command, cwd=cwd, env=env)
+
+    try:
+        output, _ = process.communicate(timeout=AUDIT_TIMEOUT_SECONDS)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        output, _ = process.communicate()
+        return None, output
+    return process.returncode, output
+
+def print_captured(header, output, status):
+    """Print a captured run as one block, so parallel audits don't interleave."""
+    if output and not output.endswith("\n"):
+        output += "\n"
+    with _PRINT_LOCK:
+        print(f"{header}\n{output or ''}{status}")
@@ -4,23 +4,85 @@ Comprehensive Security Audit Launcher
 Includes new Defender for Cloud and Azure WAF audits
 """
 
+import argparse
 import os
 import sys
 import subprocess
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+from audit_runner import AUDIT_TIMEOUT_SECONDS, print_captured, run_audit_script, uses_non_interactive_auth
+
+# Menu choice -> (working directory, script, description) for each audit
+AUDITS = {
+    '1': ("Sentinel Audit", "sentinel_audit.py", "Sentinel Basic Audit"),
+    '2': ("Sentinel SOC Optimisation Audit", "soc_optimization_audit.py", "SOC Optimization Audit"),
+    '3': ("Defender XDR Audit", "defender_xdr_audit.py", "Defender XDR Audit"),
+    '4': ("Defender for Cloud Audit", "defender_cloud_audit.py", "Defender for Cloud Audit"),
+    '5': ("Azure WAF Audit", "azure_waf_audit.py", "Azure WAF Audit"),
+}
+
+# --audit name -> menu choice
+AUDIT_CHOICES = {
+    'sentinel': '1',
+    'soc': '2',
+    'xdr': '3',
+    'cloud': '4',
+    'waf': '5',
+    'all': '6',
+}
+
+# (working directory, requirements file, description); the directory is
+# looked up through find_existing_dirs() so its on-disk case doesn't matter
+REQUIREMENTS = [
+    ("Sentinel Audit", "simple_requirements.txt", "Sentinel Basic Audit"),
+    ("Sentinel SOC Optimisation Audit", "soc_requirements.txt", "SOC Optimization"),
+    ("Defender XDR Audit", "xdr_requirements.txt", "Defender XDR"),
+    ("Defender for Cloud Audit", "defender_cloud_requirements.txt", "Defender for Cloud"),
+    ("Azure WAF Audit", "waf_requirements.txt", "Azure WAF"),
+]
+
+# Environment passed to audit children: everything except Azure App Service
+# platform settings and connection strings, which can number in the hundreds,
+# are never read by the audits, and should not leak into child processes
+CHILD_ENV_DROP_PREFIXES = (
+    'WEBSITE_', 'APPSETTING_', 'APPSVC_',
+    'CUSTOMCONNSTR_', 'SQLCONNSTR_', 'SQLAZURECONNSTR_', 'MYSQLCONNSTR_', 'POSTGRESQLCONNSTR_',
+)
+
+CHILD_ENV = {
+    key: value for key, value in os.environ.items()
+    if not key.upper().startswith(CHILD_ENV_DROP_PREFIXES)
+}
+
+BANNER = "\n".join([
+    "🛡️" + "=" * 80,
+    "🛡️  MICROSOFT SECURITY AUDIT SUITE - EXTENDED EDITION",
+    "🛡️" + "=" * 80,
+    "🎯 Sentinel Audit        - Data connectors & analytic rules",
+    "📊 SOC Optimization      - Rule efficiency & cost analysis",
+    "🛡️ Defender XDR Audit    - M365 security posture & incidents",
+    "🔐 Defender for Cloud    - Security assessments & compliance",
+    "🔥 Azure WAF Audit       - Web application firewall policies",
+    "🛡️" + "=" * 80,
+])
+
+MENU = "\n".join([
+    "\n🔐 AUDIT OPTIONS:",
+    "=" * 60,
+    "1. Sentinel Basic Audit (Data connectors & rules)",
+    "2. SOC Optimization Audit (Efficiency & costs)",
+    "3. Defender XDR Audit (M365 security posture)",
+    "4. Defender for Cloud Audit (Security assessments)",
+    "5. Azure WAF Audit (Web application firewalls)",
+    "6. Run ALL audits (Complete security assessment)",
+    "7. Install all requirements",
+    "8. Exit",
+])
+
 def print_banner():
     """Print the audit suite banner."""
-    print("🛡️" + "=" * 80)
-    print("🛡️  MICROSOFT SECURITY AUDIT SUITE - EXTENDED EDITION")
-    print("🛡️" + "=" * 80)
-    print("🎯 Sentinel Audit        - Data connectors & analytic rules")
-    print("📊 SOC Optimization      - Rule efficiency & cost analysis") 
-    print("🛡️ Defender XDR Audit    - M365 security posture & incidents")
-    print("🔐 Defender for Cloud    - Security assessments & compliance")
-    print("🔥 Azure WAF Audit       - Web application firewall policies")
-    print("🛡️" + "=" * 80)
+    print(BANNER)
 
 def check_environment():
     """Check if required environment variables are set."""
@@ -45,42 +107,62 @@ def check_environment():
     
     return True
 
-def run_audit(script_path, description, working_dir=None):
-    """Run an individual audit script."""
-    print(f"\n🚀 Starting {description}...")
-    print("=" * 60)
+def find_existing_dirs():
+    """Map each audit working directory present to its actual name on disk.
+
+    Names are compared with casefold() on every platform, so a folder whose
+    case differs from AUDITS (e.g. 'sentinel audit') is still found and run
+    from its real path, even on case-sensitive filesystems.
+    """
+    with os.scandir('.') as entries:
+        present = {entry.name.casefold(): entry.name for entry in entries if entry.is_dir()}
+    return {
+        working_dir: present[working_dir.casefold()]
+        for working_dir, _, _ in AUDITS.values()
+        if working_dir.casefold() in present
+    }
+
+def run_audit(script_path, description, working_dir=None, capture=False):
+    """Run an individual audit script.
+
+    With capture set, the child's output is collected and printed as one
+    block when it finishes, so audits running in parallel don't interleave.
+    """
+    header = f"\n🚀 Starting {description}...\n{'=' * 60}"
+    if not capture:
+        print(header)
     
     try:
-        if working_dir:
-            original_dir = os.getcwd()
-            os.chdir(working_dir)
-        
-        result = subprocess.run([sys.executable, script_path], 
-                              capture_output=False, 
-                              text=True)
-        
-        if working_dir:
-            os.chdir(original_dir)
+        # Run the child in its own directory rather than chdir-ing this
+        # process, so several audits can run side by side
+        returncode, output = run_audit_script(script_path, working_dir, CHILD_ENV, capture)
+        if returncode is None:
+            status = f"❌ {description} timed out after {AUDIT_TIMEOUT_SECONDS} seconds"
+        elif returncode == 0:
+            status = f"✅ {description} completed successfully!"
+        else:
+            status = f"❌ {description} failed with exit code {returncode}"
         
-        if result.returncode == 0:
-            print(f"✅ {description} completed successfully!")
+        if capture:
+            print_captured(header, output, status)
         else:
-            print(f"❌ {description} failed with exit code {result.returncode}")
+            print(status)
         
-        return result.returncode == 0
+        return returncode == 0
     
     except Exception as e:
         print(f"❌ Error running {description}: {e}")
-        if working_dir:
-            os.chdir(original_dir)
         return False
 
-def install_requirements(requirements_file, description):
-    """Install requirements for an audit tool."""
+def install_requirements(requirements_files, description):
+    """Install one or more requirements files with a single pip invocation."""
     print(f"📦 Installing requirements for {description}...")
+    command = [sys.executable, "-m", "pip", "install", "--disable-pip-version-check", "--no-input"]
+    for requirements_file in requirements_files:
+        command.extend(["-r", requirements_file])
     try:
-        result = subprocess.run([sys.executable, "-m", "pip", "install", "-r", requirements_file], 
-                              capture_output=True, text=True)
+        # Let pip's progress stream to the console; keep stderr for the warning below
+        result = subprocess.run(command, stderr=subprocess.PIPE, text=True)
         if result.returncode == 0:
             print(f"✅ Requirements installed for {description}")
         else:
@@ -91,125 +173,142 @@ def install_requirements(requirements_file, description):
         print(f"❌ Error installing requirements for {description}: {e}")
         return False
 
-def main():
+def run_all_audits(existing_dirs, parallel=True):
+    """Run every available audit and print a summary.
+
+    Audits run concurrently when parallel is set and authentication is
+    non-interactive, and one at a time otherwise. Returns True only if every
+    audit ran and succeeded.
+    """
+    print("\n🚀 Starting COMPREHENSIVE Security Audit...")
+    print("=" * 80)
+    
+    successful_audits = 0
+    total_audits = len(AUDITS)
+    
+    # The audits are independent and network-bound, so run them concurrently
+    # unless a login prompt would have to be shared between them
+    if not parallel:
+        max_workers = 1
+    elif uses_non_interactive_auth():
+        max_workers = total_audits
+    else:
+        print("🔐 Interactive authentication in use - running audits one at a time")
+        print("   Set AUTH_MODE=cli or service principal credentials to run them in parallel")
+        max_workers = 1
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for working_dir, script, description in AUDITS.values():
+            if working_dir in existing_dirs:
+                futures.append(executor.submit(run_audit, script, description, existing_dirs[working_dir], max_workers > 1))
+            else:
+                print(f"⚠️  Skipping {description} - directory '{working_dir}' not found")
+        
+        for future in as_completed(futures):
+            if future.result():
+                successful_audits += 1
+    
+    print("\n" + "=" * 80)
+    print("🎯 COMPREHENSIVE AUDIT SUMMARY")
+    print("=" * 80)
+    print(f"✅ Successful audits: {successful_audits}/{total_audits}")
+    print(f"📁 Check output folder for all generated reports")
+    print("=" * 80)
+    
+    return successful_audits == total_audits
+
+def install_all_requirements(existing_dirs):
+    """Install the requirements of every audit tool.
+
+    Returns True only if every requirements file was found and installed.
+    """
+    print("\n📦 Installing all requirements...")
+    print("=" * 60)
+    
+    # Resolve every file in one pip run so shared Azure SDK
+    # dependencies are only resolved and downloaded once
+    found_files = []
+    found_descriptions = []
+    for working_dir, file_name, description in REQUIREMENTS:
+        actual_dir = existing_dirs.get(working_dir)
+        if actual_dir is not None:
+            # One directory read per audit folder instead of a stat per file
+            with os.scandir(actual_dir) as entries:
+                present = {entry.name for entry in entries if entry.is_file()}
+            if file_name in present:
+                found_files.append(os.path.join(actual_dir, file_name))
+                found_descriptions.append(description)
+                continue
+        print(f"⚠️  Requirements file not found: {working_dir}/{file_name}")
+    
+    installed = False
+    if found_files:
+        installed = install_requirements(found_files, ", ".join(found_descriptions))
+    
+    print("\n✅ Requirements installation completed!")
+    return installed and len(found_files) == len(REQUIREMENTS)
+
+def run_choice(choice, existing_dirs, parallel=True):
+    """Run the action for a menu choice (1-7).
+
+    Returns True if it succeeded, False if it failed, and None for unknown choices.
+    """
+    if choice in AUDITS:
+        working_dir, script, description = AUDITS[choice]
+        if working_dir in existing_dirs:
+            return run_audit(script, description, existing_dirs[working_dir])
+        print(f"❌ Directory '{working_dir}' not found")
+        return False
+    if choice == '6':
+        return run_all_audits(existing_dirs, parallel)
+    if choice == '7':
+        return install_all_requirements(existing_dirs)
+    return None
+
+def build_parser():
+    """Build the command-line parser for non-interactive runs."""
+    parser = argparse.ArgumentParser(
+        description="Run the Microsoft security audit suite. Without options an interactive menu is shown."
+    )
+    parser.add_argument("--audit", choices=list(AUDIT_CHOICES), help="Audit to run without prompting ('all' runs every audit)")
+    parser.add_argument("--serial", action="store_true", help="Run audits one at a time even when authentication is non-interactive")
+    parser.add_argument("--install-requirements", action="store_true", help="Install the requirements of every audit tool")
+    return parser
+
+def main(argv=None):
     """Main function with interactive menu."""
+    args = build_parser().parse_args(argv)
     print_banner()
     
+    # Non-interactive invocation: do what was asked and skip the menu,
+    # exiting non-zero on any failure so CI can detect it
+    if args.audit or args.install_requirements:
+        existing_dirs = find_existing_dirs()
+        succeeded = True
+        if args.install_requirements:
+            succeeded = install_all_requirements(existing_dirs)
+        if args.audit:
+            if not check_environment():
+                sys.exit(1)
+            succeeded = run_choice(AUDIT_CHOICES[args.audit], existing_dirs, parallel=not args.serial) and succeeded
+        if not succeeded:
+            sys.exit(1)
+        return
+    
     if not check_environment():
         sys.exit(1)
     
-    print("\n🔐 AUDIT OPTIONS:")
-    print("=" * 60)
-    print("1. Sentinel Basic Audit (Data connectors & rules)")
-    print("2. SOC Optimization Audit (Efficiency & costs)")
-    print("3. Defender XDR Audit (M365 security posture)")
-    print("4. Defender for Cloud Audit (Security assessments)")
-    print("5. Azure WAF Audit (Web application firewalls)")
-    print("6. Run ALL audits (Complete security assessment)")
-    print("7. Install all requirements")
-    print("8. Exit")
+    # Probe the audit directories once instead of on every menu branch
+    existing_dirs = find_existing_dirs()
+    
+    print(MENU)
     
     while True:
         try:
             choice = input("\nChoose audit option (1-8): ").strip()
             
-            if choice == '1':
-                # Sentinel Basic Audit
-                working_dir = "Sentinel Audit"
-                if os.path.exists(working_dir):
-                    run_audit("sentinel_audit.py", "Sentinel Basic Audit", working_dir)
-                else:
-                    print(f"❌ Directory '{working_dir}' not found")
-                break
-                
-            elif choice == '2':
-                # SOC Optimization Audit
-                working_dir = "Sentinel SOC Optimisation Audit"
-                if os.path.exists(working_dir):
-                    run_audit("soc_optimization_audit.py", "SOC Optimization Audit", working_dir)
-                else:
-                    print(f"❌ Directory '{working_dir}' not found")
-                break
-                
-            elif choice == '3':
-                # Defender XDR Audit
-                working_dir = "Defender XDR Audit"
-                if os.path.exists(working_dir):
-                    run_audit("defender_xdr_audit.py", "Defender XDR Audit", working_dir)
-                else:
-                    print(f"❌ Directory '{working_dir}' not found")
-                break
-                
-            elif choice == '4':
-                # Defender for Cloud Audit
-                working_dir = "Defender for Cloud Audit"
-                if os.path.exists(working_dir):
-                    run_audit("defender_cloud_audit.py", "Defender for Cloud Audit", working_dir)
-                else:
-                    print(f"❌ Directory '{working_dir}' not found")
-                break
-                
-            elif choice == '5':
-                # Azure WAF Audit
-                working_dir = "Azure WAF Audit"
-                if os.path.exists(working_dir):
-                    run_audit("azure_waf_audit.py", "Azure WAF Audit", working_dir)
-                else:
-                    print(f"❌ Directory '{working_dir}' not found")
-                break
-                
-            elif choice == '6':
-                # Run ALL audits
-                print("\n🚀 Starting COMPREHENSIVE Security Audit...")
-                print("=" * 80)
-                
-                audits = [
-                    ("Sentinel Audit", "sentinel_audit.py", "Sentinel Basic Audit"),
-                    ("Sentinel SOC Optimisation Audit", "soc_optimization_audit.py", "SOC Optimization Audit"),
-                    ("Defender XDR Audit", "defender_xdr_audit.py", "Defender XDR Audit"),
-                    ("Defender for Cloud Audit", "defender_cloud_audit.py", "Defender for Cloud Audit"),
-                    ("Azure WAF Audit", "azure_waf_audit.py", "Azure WAF Audit")
-                ]
-                
-                successful_audits = 0
-                total_audits = len(audits)
-                
-                for working_dir, script, description in audits:
-                    if os.path.exists(working_dir):
-                        if run_audit(script, description, working_dir):
-                            successful_audits += 1
-                        time.sleep(2)  # Brief pause between audits
-                    else:
-                        print(f"⚠️  Skipping {description} - directory '{working_dir}' not found")
-                
-                print("\n" + "=" * 80)
-                print("🎯 COMPREHENSIVE AUDIT SUMMARY")
-                print("=" * 80)
-                print(f"✅ Successful audits: {successful_audits}/{total_audits}")
-                print(f"📁 Check output folder for all generated reports")
-                print("=" * 80)
-                break
-                
-            elif choice == '7':
-                # Install all requirements
-                print("\n📦 Installing all requirements...")
-                print("=" * 60)
-                
-                requirements = [
-                    ("Sentinel Audit/simple_requirements.txt", "Sentinel Basic Audit"),
-                    ("Sentinel SOC Optimisation Audit/soc_requirements.txt", "SOC Optimization"),
-                    ("Defender XDR Audit/xdr_requirements.txt", "Defender XDR"),
-                    ("Defender for Cloud Audit/defender_cloud_requirements.txt", "Defender for Cloud"),
-                    ("Azure WAF Audit/waf_requirements.txt", "Azure WAF")
-                ]
-                
-                for req_file, description in requirements:
-                    if os.path.exists(req_file):
-                        install_requirements(req_file, description)
-                    else:
-                        print(f"⚠️  Requirements file not found: {req_file}")
-                
-                print("\n✅ Requirements installation completed!")
+            if run_choice(choice, existing_dirs) is not None:
                 break
                 
             elif choice == '8':
@@ -4,14 +4,21 @@ Authentication Helper for Sentinel Audit Tools
 Provides easy authentication options for all audit scripts.
 """
 
+import fnmatch
 import os
+import re
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 
+from audit_runner import AUDIT_TIMEOUT_SECONDS, print_captured, run_audit_script, uses_non_interactive_auth
 
-DEFAULT_OUTPUT_DIR = Path(__file__).resolve().parent / "output"
-REPORT_TOOL_DIR = Path(__file__).resolve().parent / "Report tool"
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTPUT_DIR = SCRIPT_DIR / "output"
+REPORT_TOOL_DIR = SCRIPT_DIR / "Report tool"
 
 REQUIRED_REPORT_PATTERNS = {
     "Sentinel analytic rules": "sentinel_analytic_rules_*.csv",
@@ -21,31 +28,50 @@ REQUIRED_REPORT_PATTERNS = {
     "SOC recommendations": "soc_recommendations_*.csv",
 }
 
+# All patterns compiled once into a single alternation, one named group per
+# report; normcase keeps matching case-insensitive on Windows like fnmatch
+_REQUIRED_REPORT_LABELS = list(REQUIRED_REPORT_PATTERNS)
+_REQUIRED_REPORT_RX = re.compile("|".join(
+    f"(?P<r{index}>{fnmatch.translate(os.path.normcase(pattern))})"
+    for index, pattern in enumerate(REQUIRED_REPORT_PATTERNS.values())
+))
+
 
+@lru_cache(maxsize=1)
 def resolve_output_dir() -> Path:
-    """Resolve and ensure the common output directory exists."""
+    """Resolve and ensure the common output directory exists.
+
+    OUTPUT_DIR is exported as the absolute path, so every child process
+    (audits and the report tool) inherits the same directory regardless
+    of its working directory.
+    """
     env_value = os.environ.get('OUTPUT_DIR')
 
     if env_value:
         candidate = Path(env_value)
         if not candidate.is_absolute():
-            candidate = (Path(__file__).resolve().parent / candidate).resolve()
+            candidate = (SCRIPT_DIR / candidate).resolve()
     else:
         candidate = DEFAULT_OUTPUT_DIR
-        os.environ['OUTPUT_DIR'] = str(candidate)
+    os.environ['OUTPUT_DIR'] = str(candidate)
 
     candidate.mkdir(parents=True, exist_ok=True)
     return candidate
 
 
 def _collect_required_reports(output_dir: Path):
-    """Return missing required patterns and the latest file for each available one."""
-    missing = []
-    for label, pattern in REQUIRED_REPORT_PATTERNS.items():
-        matches = sorted(output_dir.glob(pattern), key=lambda p: p.stat().st_mtime, reverse=True)
-        if not matches:
-            missing.append(label)
-    return missing
+    """Return the labels of required reports with no matching file in output_dir."""
+    # One directory read and one regex match per file name
+    with os.scandir(output_dir) as entries:
+        found = set()
+        for entry in entries:
+            match = _REQUIRED_REPORT_RX.match(os.path.normcase(entry.name))
+            if match and entry.is_file():
+                found.add(match.lastgroup)
+    return [
+        label for index, label in enumerate(_REQUIRED_REPORT_LABELS)
+        if f"r{index}" not in found
+    ]
 
 
 def offer_combined_report(output_dir: Path):
@@ -73,15 +99,12 @@ def offer_combined_report(output_dir: Path):
         return
 
     print("\n🛠️  Generating combined report...")
-    env = os.environ.copy()
-    env['OUTPUT_DIR'] = str(output_dir)
 
     try:
         subprocess.run(
             [sys.executable, "run_combined_report.py"],
             cwd=str(REPORT_TOOL_DIR),
             check=True,
-            env=env,
         )
     except subprocess.CalledProcessError as error:
         print(f"❌ Report generation failed (exit code {error.returncode}).")
@@ -153,28 +176,32 @@ def set_auth_mode():
             print("\n❌ Setup cancelled by user")
             return None
 
-def run_script_with_auth(script_path, script_name):
-    """Run a script with the chosen authentication method."""
-    print(f"\n🚀 Running {script_name}...")
-    print("-" * 40)
+def run_script_with_auth(script_path, script_name, capture=False):
+    """Run a script with the chosen authentication method.
+
+    With capture set, the script's output is collected and printed in one
+    block once it finishes, so concurrent runs don't interleave.
+    """
+    header = f"\n🚀 Running {script_name}...\n{'-' * 40}"
+    if not capture:
+        print(header)
     
     try:
-        # Check if script exists
-        if not os.path.exists(script_path):
-            print(f"❌ Script not found: {script_path}")
-            return False
-        
-        # Run the script
-        result = subprocess.run([sys.executable, script_path], 
-                              cwd=os.path.dirname(script_path),
-                              check=False)
+        # main() only passes scripts it has already found, and a missing
+        # file still surfaces as a non-zero exit from the interpreter
+        returncode, output = run_audit_script(script_path, os.path.dirname(script_path), capture=capture)
+        if returncode is None:
+            status = f"❌ {script_name} timed out after {AUDIT_TIMEOUT_SECONDS} seconds"
+        elif returncode == 0:
+            status = f"✅ {script_name} completed successfully"
+        else:
+            status = f"❌ {script_name} failed with exit code {returncode}"
         
-        if result.returncode == 0:
-            print(f"✅ {script_name} completed successfully")
-            return True
+        if capture:
+            print_captured(header, output, status)
         else:
-            print(f"❌ {script_name} failed with exit code {result.returncode}")
-            return False
+            print(status)
+        return returncode == 0
             
     except Exception as e:
         print(f"❌ Error running {script_name}: {e}")
@@ -239,10 +266,22 @@ def main():
             if run_choice == '1':
                 print("\n🚀 Running all available audit scripts...")
                 success_count = 0
-                for name, path in available_scripts.items():
-                    if run_script_with_auth(str(path), name):
-                        success_count += 1
-                        any_success = True
+                if uses_non_interactive_auth():
+                    # No prompts to answer, so the I/O-bound audits can run side by side
+                    print("⚡ Running audits in parallel")
+                    with ThreadPoolExecutor(max_workers=len(available_scripts)) as executor:
+                        futures = [
+                            executor.submit(run_script_with_auth, str(path), name, True)
+                            for name, path in available_scripts.items()
+                        ]
+                        for future in as_completed(futures):
+                            if future.result():
+                                success_count += 1
+                else:
+                    for name, path in available_scripts.items():
+                        if run_script_with_auth(str(path), name):
+                            success_count += 1
+                any_success = success_count > 0
                 
                 print(f"\n📊 Summary: {success_count}/{len(available_scripts)} scripts completed successfully")
                 break
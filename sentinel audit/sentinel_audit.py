@@ -6,14 +6,19 @@ Exports enabled data connectors and analytic rules to CSV files.
 
 import os
 import csv
+import gzip
+import re
 import sys
-from datetime import datetime
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from azure.identity import DefaultAzureCredential, ClientSecretCredential, InteractiveBrowserCredential, DeviceCodeCredential
-from azure.mgmt.securityinsight import SecurityInsights
-from azure.mgmt.subscription import SubscriptionClient
-from azure.mgmt.resource import ResourceManagementClient
-from azure.core.exceptions import AzureError
+
+# The Azure SDK and requests are imported where they are used, so a run that
+# stops at the configuration check never pays for loading them
 
 # Configuration
 SUBSCRIPTION_ID = os.getenv('AZURE_SUBSCRIPTION_ID')
@@ -25,6 +30,28 @@ TENANT_ID = os.getenv('AZURE_TENANT_ID')
 CLIENT_ID = os.getenv('AZURE_CLIENT_ID')
 CLIENT_SECRET = os.getenv('AZURE_CLIENT_SECRET')
 
+# Refresh a cached access token this many seconds before it expires
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+
+# Offer/plan names stripped from subscription names to find the customer name
+SUBSCRIPTION_NAME_NOISE = re.compile(r'Microsoft Azure Sponsorship|Pay-As-You-Go|Free Trial')
+
+# Lowercased names too generic to identify a customer
+GENERIC_CUSTOMER_NAMES = frozenset({"", "microsoft", "azure", "subscription"})
+
+# Display names for common data connector kinds
+FRIENDLY_CONNECTOR_NAMES = {
+    'AzureSecurityCenter': 'Microsoft Defender for Cloud',
+    'AzureActiveDirectory': 'Azure Active Directory',
+    'AzureAdvancedThreatProtection': 'Microsoft Defender for Identity',
+    'MicrosoftDefenderAdvancedThreatProtection': 'Microsoft Defender for Endpoint',
+    'MicrosoftCloudAppSecurity': 'Microsoft Defender for Cloud Apps',
+    'Office365': 'Microsoft 365',
+    'MicrosoftThreatIntelligence': 'Microsoft Threat Intelligence',
+    'SecurityEvents': 'Security Events via AMA',
+    'WindowsFirewall': 'Windows Defender Firewall'
+}
+
 
 def resolve_output_dir() -> Path:
     """Resolve and create the output directory for generated reports."""
@@ -41,8 +68,47 @@ def resolve_output_dir() -> Path:
     candidate.mkdir(parents=True, exist_ok=True)
     return candidate
 
+@lru_cache(maxsize=1)
+def get_shared_transport():
+    """Return one HTTP transport shared by every Azure SDK client in this run.
+
+    All clients talk to management.azure.com, so sharing the session lets
+    them reuse pooled TLS connections instead of each opening their own.
+    """
+    import requests
+    from azure.core.pipeline.transport import RequestsTransport
+
+    return RequestsTransport(session=requests.Session(), session_owner=False)
+
+class CachedTokenCredential:
+    """Share access tokens between all SDK clients created in this run.
+
+    Each client's auth policy keeps its own token, so without this the
+    Azure CLI credential runs `az` once per client. Fetches are
+    serialised, so concurrent audits trigger a single sign-in.
+    """
+
+    def __init__(self, credential):
+        self._credential = credential
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes, **kwargs):
+        # Claims challenges need a fresh token and are never cached
+        if kwargs.get('claims'):
+            return self._credential.get_token(*scopes, **kwargs)
+
+        key = (scopes, kwargs.get('tenant_id'))
+        with self._lock:
+            token = self._tokens.get(key)
+            if token is None or token.expires_on - time.time() < TOKEN_REFRESH_MARGIN_SECONDS:
+                token = self._credential.get_token(*scopes, **kwargs)
+                self._tokens[key] = token
+            return token
+
 def get_azure_credential():
     """Get Azure credentials with interactive options."""
+    from azure.identity import DefaultAzureCredential, ClientSecretCredential, InteractiveBrowserCredential, DeviceCodeCredential
     
     # Check for authentication mode preference
     auth_mode = os.getenv('AUTH_MODE', '').lower()
@@ -63,7 +129,7 @@ def get_azure_credential():
         print("💡 Make sure you've run 'az login' first")
         return DefaultAzureCredential()
     
-    elif all([TENANT_ID, CLIENT_ID, CLIENT_SECRET]):
+    elif TENANT_ID and CLIENT_ID and CLIENT_SECRET:
         print("🔑 Using Service Principal authentication")
         return ClientSecretCredential(TENANT_ID, CLIENT_ID, CLIENT_SECRET) # type: ignore
     
@@ -109,26 +175,23 @@ def get_azure_credential():
 
 def get_customer_info(credential):
     """Get customer information from Azure subscription and tenant details."""
+    from azure.mgmt.subscription import SubscriptionClient
+
     try:
         # Get subscription info
-        subscription_client = SubscriptionClient(credential)
+        subscription_client = SubscriptionClient(credential, transport=get_shared_transport())
         subscription = subscription_client.subscriptions.get(SUBSCRIPTION_ID) # type: ignore
-        
-        # Get tenant info from resource management
-        resource_client = ResourceManagementClient(credential, SUBSCRIPTION_ID) # type: ignore
         tenant_id = subscription.tenant_id # type: ignore
         
         # Extract meaningful customer name
         subscription_name = subscription.display_name or "Unknown Subscription"
         
         # Common patterns to clean up subscription names
-        customer_name = subscription_name.replace("Microsoft Azure Sponsorship", "").strip()
-        customer_name = customer_name.replace("Pay-As-You-Go", "").strip()
-        customer_name = customer_name.replace("Free Trial", "").strip()
+        customer_name = SUBSCRIPTION_NAME_NOISE.sub("", subscription_name).strip()
         customer_name = customer_name.split("-")[0].strip() if "-" in customer_name else customer_name
         
         # If still generic, try to extract from resource group pattern
-        if customer_name.lower() in ["", "microsoft", "azure", "subscription"]:
+        if customer_name.lower() in GENERIC_CUSTOMER_NAMES:
             if RESOURCE_GROUP:
                 # Extract customer name from resource group (common pattern: customer-rg-region)
                 rg_parts = RESOURCE_GROUP.split("-")
@@ -136,7 +199,7 @@ def get_customer_info(credential):
                     customer_name = rg_parts[0].title()
         
         # Fallback to a cleaned subscription name
-        if not customer_name or customer_name.lower() in ["", "microsoft", "azure"]:
+        if not customer_name or customer_name.lower() in {"microsoft", "azure"}:
             customer_name = "Azure Customer"
             
         return {
@@ -163,9 +226,10 @@ def get_customer_info(credential):
 
 def audit_data_connectors(client):
     """Audit data connectors and return a clean summary."""
+    from azure.core.exceptions import AzureError
+
     print("Auditing data connectors...")
     connectors = []
-    connector_counts = {}
     
     try:
         # List all data connectors
@@ -174,29 +238,12 @@ def audit_data_connectors(client):
             workspace_name=WORKSPACE_NAME
         )
         
-        # Count connectors by type
-        for connector in data_connectors:
-            connector_type = connector.kind
-            if connector_type not in connector_counts:
-                connector_counts[connector_type] = 0
-            connector_counts[connector_type] += 1
+        # Count connectors by type in a single pass
+        connector_counts = Counter(connector.kind for connector in data_connectors)
         
         # Create clean summary
         for connector_type, count in connector_counts.items():
-            # Create friendly names
-            friendly_names = {
-                'AzureSecurityCenter': 'Microsoft Defender for Cloud',
-                'AzureActiveDirectory': 'Azure Active Directory',
-                'AzureAdvancedThreatProtection': 'Microsoft Defender for Identity',
-                'MicrosoftDefenderAdvancedThreatProtection': 'Microsoft Defender for Endpoint',
-                'MicrosoftCloudAppSecurity': 'Microsoft Defender for Cloud Apps',
-                'Office365': 'Microsoft 365',
-                'MicrosoftThreatIntelligence': 'Microsoft Threat Intelligence',
-                'SecurityEvents': 'Security Events via AMA',
-                'WindowsFirewall': 'Windows Defender Firewall'
-            }
-            
-            display_name = friendly_names.get(connector_type, connector_type)
+            display_name = FRIENDLY_CONNECTOR_NAMES.get(connector_type, connector_type)
             
             print(f"  Found: {display_name} ({count} instances)")
             
@@ -216,8 +263,9 @@ def audit_data_connectors(client):
 
 def audit_analytic_rules(client):
     """Audit analytic rules and return enabled ones."""
+    from azure.core.exceptions import AzureError
+
     print("Auditing analytic rules...")
-    rules = []
     
     try:
         # List all alert rules
@@ -226,13 +274,12 @@ def audit_analytic_rules(client):
             workspace_name=WORKSPACE_NAME
         )
         
-        for rule in alert_rules:
-            # Only include enabled rules
-            if hasattr(rule, 'enabled') and rule.enabled:
-                rules.append({
-                    'Name': rule.display_name or rule.name,
-                    'Enabled': rule.enabled
-                })
+        # Only include enabled rules
+        rules = [
+            {'Name': rule.display_name or rule.name, 'Enabled': rule.enabled}
+            for rule in alert_rules
+            if getattr(rule, 'enabled', False)
+        ]
         
         print(f"Found {len(rules)} enabled analytic rules")
         return rules
@@ -242,12 +289,26 @@ def audit_analytic_rules(client):
         return []
 
 def export_to_csv(data, file_path: Path, fieldnames):
-    """Export data to CSV file."""
+    """Export data to CSV file, gzip-compressed when COMPRESS_CSV is set.
+
+    COMPRESS_CSV=1 (environment or .env) writes .csv.gz reports for archiving;
+    the combined report tooling only reads plain .csv files.
+    """
+    # Read at call time so a value from .env, loaded in main(), is honoured
+    compress = os.getenv('COMPRESS_CSV', '').lower() in ('1', 'true', 'yes')
+    if compress:
+        file_path = file_path.with_name(file_path.name + '.gz')
     try:
-        with file_path.open('w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
+        if compress:
+            # Level 1: the output is small and highly repetitive, so speed wins
+            csvfile = gzip.open(file_path, 'wt', newline='', encoding='utf-8', compresslevel=1)
+        else:
+            csvfile = file_path.open('w', newline='', encoding='utf-8')
+        with csvfile:
+            # Plain rows skip DictWriter's per-row dict validation and lookups
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            writer.writerows([tuple(row[field] for field in fieldnames) for row in data])
         print(f"✅ Exported {len(data)} records to {file_path}")
     except Exception as e:
         print(f"❌ Error writing to {file_path}: {e}")
@@ -265,7 +326,7 @@ def main():
         print(f"📁 Loaded configuration from {env_file}")
     
     # Check required environment variables
-    if not all([SUBSCRIPTION_ID, RESOURCE_GROUP, WORKSPACE_NAME]):
+    if not (SUBSCRIPTION_ID and RESOURCE_GROUP and WORKSPACE_NAME):
         print("❌ Missing required environment variables:")
         print("   AZURE_SUBSCRIPTION_ID")
         print("   RESOURCE_GROUP_NAME") 
@@ -283,6 +344,9 @@ def main():
         print('   $env:AUTH_MODE = "device"')
         sys.exit(1)
     
+    from azure.core.exceptions import AzureError
+    from azure.mgmt.securityinsight import SecurityInsights
+
     print(f"Subscription: {SUBSCRIPTION_ID}")
     print(f"Resource Group: {RESOURCE_GROUP}")
     print(f"Workspace: {WORKSPACE_NAME}")
@@ -290,7 +354,7 @@ def main():
     
     try:
         # Get credentials and create client
-        credential = get_azure_credential()
+        credential = CachedTokenCredential(get_azure_credential())
         
         # Get customer information first
         print("🏢 Retrieving customer information...")
@@ -300,27 +364,30 @@ def main():
         print(f"🆔 Tenant ID: {customer_info['tenant_id']}")
         print()
         
-        client = SecurityInsights(credential, SUBSCRIPTION_ID) # type: ignore
-        
-        # Audit data connectors
-        connectors = audit_data_connectors(client)
+        client = SecurityInsights(credential, SUBSCRIPTION_ID, transport=get_shared_transport()) # type: ignore
         
-        # Audit analytic rules  
-        rules = audit_analytic_rules(client)
+        # Audit data connectors and analytic rules concurrently; both are
+        # independent, network-bound list calls against the same workspace
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            connectors_future = executor.submit(audit_data_connectors, client)
+            rules_future = executor.submit(audit_analytic_rules, client)
+            connectors = connectors_future.result()
+            rules = rules_future.result()
         
         # Resolve output directory
         output_dir = resolve_output_dir()
         print(f"📁 Output directory: {output_dir}")
 
-        # Generate timestamp for filenames
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Generate timestamp for filenames and metadata from one clock read
+        now = datetime.now(timezone.utc)
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
         
         # Save customer information to metadata file
         metadata_file = output_dir / f'sentinel_customer_info_{timestamp}.csv'
         with metadata_file.open('w', newline='', encoding='utf-8') as csvfile:
             writer = csv.DictWriter(csvfile, fieldnames=['customer_name', 'subscription_name', 'subscription_id', 'tenant_id', 'audit_timestamp'])
             writer.writeheader()
-            customer_info['audit_timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
+            customer_info['audit_timestamp'] = now.strftime("%Y-%m-%d %H:%M:%S UTC")
             writer.writerow(customer_info)
         print(f"💾 Customer metadata saved to: {metadata_file}")
         
@@ -4,33 +4,81 @@ Setup script for Microsoft Security Audit Suite
 Installs dependencies for all audit tools
 """
 
+import importlib.util
 import os
+import re
 import subprocess
 import sys
+from importlib.metadata import PackageNotFoundError, version
 from pathlib import Path
 
-ENV_VARIABLES = [
+BANNER = "\n".join([
+    "🚀 Microsoft Security Audit Suite Setup",
+    "=" * 50,
+])
+
+NEXT_STEPS = "\n".join([
+    "",
+    "🎯 Next steps:",
+    "   1. Set up your environment variables (see README.md)",
+    "   2. Run individual audit scripts or use GitHub Actions",
+    "   3. Test connectivity with the test scripts",
+])
+
+TROUBLESHOOTING = "\n".join([
+    "",
+    "🔧 Troubleshooting:",
+    "   1. Check that you have internet connectivity",
+    "   2. Ensure pip is up to date",
+    "   3. Try installing dependencies manually",
+])
+
+# (directory, requirements file, icon, name) for each component setup installs
+COMPONENTS = (
+    ("Sentinel Audit", "simple_requirements.txt", "📊", "Sentinel Audit"),
+    ("Sentinel SOC Optimisation Audit", "soc_requirements.txt", "🔍", "SOC Optimization"),
+    ("Defender XDR Audit", "xdr_requirements.txt", "🛡️ ", "Defender XDR Audit"),
+)
+
+# Pre-downloaded wheels (pip download -r <file> -d wheels); when present,
+# setup installs from here without contacting PyPI
+WHEELS_DIR = Path("wheels")
+
+# Per-request timeout and retries for pip; values already set in the environment win
+PIP_ENV_DEFAULTS = {"PIP_DEFAULT_TIMEOUT": "60", "PIP_RETRIES": "5"}
+
+# pip releases at or above this are new enough; older ones get upgraded first
+MIN_PIP_VERSION = (24, 0)
+
+# (key, description, required) for each value the wizard collects
+ENV_VARIABLES = (
     ("AZURE_TENANT_ID", "Azure AD tenant ID (GUID)", True),
     ("AZURE_SUBSCRIPTION_ID", "Subscription ID containing Microsoft Sentinel", True),
     ("RESOURCE_GROUP_NAME", "Resource group name for the Sentinel workspace", True),
     ("WORKSPACE_NAME", "Log Analytics workspace name (Sentinel)", True),
     ("AUTH_MODE", "Authentication preference (device/browser/cli/auto)", False),
     ("AZURE_CLIENT_ID", "Optional Azure app (client) ID for Microsoft Graph", False),
-]
+)
+
+def run_command(command, cwd=None, timeout=300):
+    """Run a command (argument list, no shell) and return success status.
 
-def run_command(command, cwd=None):
-    """Run a command and return success status."""
+    stdout streams straight to the console so long pip runs show progress;
+    only stderr is captured, to report why a command failed. Pass
+    timeout=None for commands (like large installs) that may run long.
+    """
+    env = {**PIP_ENV_DEFAULTS, **os.environ}
     try:
         result = subprocess.run(
             command,
-            shell=True,
             cwd=cwd,
-            capture_output=True,
+            stderr=subprocess.PIPE,
             text=True,
-            timeout=300
+            timeout=timeout,
+            env=env
         )
         if result.returncode == 0:
-            return True, result.stdout
+            return True, ""
         else:
             return False, result.stderr
     except subprocess.TimeoutExpired:
@@ -38,68 +86,58 @@ def run_command(command, cwd=None):
     except Exception as e:
         return False, str(e)
 
-def setup_sentinel_audit():
-    """Set up Sentinel audit dependencies."""
-    print("📊 Setting up Sentinel Audit...")
-    
-    sentinel_dir = Path("Sentinel Audit")
-    if not sentinel_dir.exists():
-        print("   ⚠️  Sentinel Audit directory not found")
-        return False
-    
-    success, output = run_command(
-        "pip install -r simple_requirements.txt",
-        cwd=sentinel_dir
-    )
-    
-    if success:
-        print("   ✅ Sentinel audit dependencies installed")
-        return True
-    else:
-        print(f"   ❌ Failed to install Sentinel dependencies: {output}")
+def pip_is_current():
+    """Return True if the installed pip is at least MIN_PIP_VERSION."""
+    try:
+        installed = version("pip")
+    except PackageNotFoundError:
         return False
+    parts = tuple(int(part) for part in re.findall(r"\d+", installed)[:2])
+    return parts >= MIN_PIP_VERSION
 
-def setup_soc_optimization():
-    """Set up SOC optimization audit dependencies."""
-    print("🔍 Setting up SOC Optimization...")
-    
-    soc_dir = Path("Sentinel SOC Optimisation Audit")
-    if not soc_dir.exists():
-        print("   ⚠️  SOC Optimization directory not found")
-        return False
-    
-    success, output = run_command(
-        "pip install -r soc_requirements.txt",
-        cwd=soc_dir
-    )
-    
-    if success:
-        print("   ✅ SOC optimization dependencies installed")
-        return True
-    else:
-        print(f"   ❌ Failed to install SOC dependencies: {output}")
-        return False
+def find_component_requirements():
+    """Return each component's requirements file, or None where the component is missing."""
+    requirement_files = []
+    for directory, requirements, icon, name in COMPONENTS:
+        print(f"{icon} Checking {name}...")
+        component_dir = Path(directory)
+        if component_dir.exists():
+            requirement_files.append(component_dir / requirements)
+        else:
+            print(f"   ⚠️  {name} directory not found")
+            requirement_files.append(None)
+    return requirement_files
 
-def setup_defender_xdr():
-    """Set up Defender XDR audit dependencies."""
-    print("🛡️  Setting up Defender XDR Audit...")
-    
-    xdr_dir = Path("Defender XDR Audit")
-    if not xdr_dir.exists():
-        print("   ⚠️  Defender XDR Audit directory not found")
-        return False
+def install_component_requirements(requirement_files):
+    """Install every found requirements file in one pip run.
+
+    A single resolver pass fetches dependencies shared by the components
+    (azure-core, msal, requests, ...) once instead of per component.
+    Returns one success flag per entry; missing components count as failed.
+    """
+    found = [path for path in requirement_files if path is not None]
+    if not found:
+        return [False] * len(requirement_files)
     
-    success, output = run_command(
-        "pip install -r xdr_requirements.txt",
-        cwd=xdr_dir
-    )
+    print("📦 Installing dependencies for all components...")
+    # Prefer a wheel over an sdist when both exist (an sdist is still used if no
+    # wheel is published); pip's wheel cache makes repeat setups local-disk installs
+    command = [sys.executable, "-m", "pip", "install", "--prefer-binary"]
+    if WHEELS_DIR.is_dir():
+        print(f"   📁 Installing offline from pre-staged wheels in {WHEELS_DIR}/")
+        command += ["--no-index", "--find-links", str(WHEELS_DIR.resolve())]
+    for path in found:
+        command += ["-r", str(path)]
+    # A full Azure SDK install can exceed any fixed deadline on a slow link;
+    # pip's per-request timeout and retries (PIP_* env) bound it instead
+    success, output = run_command(command, timeout=None)
     
     if success:
-        print("   ✅ Defender XDR audit dependencies installed")
-        return True
+        print("   ✅ Component dependencies installed")
     else:
-        print(f"   ❌ Failed to install Defender XDR dependencies: {output}")
-        return False
+        print(f"   ❌ Failed to install component dependencies: {output}")
+    
+    return [success and path is not None for path in requirement_files]
 
 def test_installations():
     """Test that all packages are installed correctly."""
@@ -115,10 +153,16 @@ def test_installations():
     all_good = True
     
     for package in test_packages:
+        # find_spec locates the module without running the SDK's import-time setup;
+        # it raises if a parent package (e.g. azure) is missing entirely
         try:
-            __import__(package)
-            print(f"   ✅ {package}")
+            installed = importlib.util.find_spec(package) is not None
         except ImportError:
+            installed = False
+        
+        if installed:
+            print(f"   ✅ {package}")
+        else:
             print(f"   ❌ {package} - Not installed")
             all_good = False
     
@@ -170,7 +214,13 @@ def write_env_file(env_values):
         else:
             lines.append(f"#{key}=")
 
-    env_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    # Create the file owner-only (0600) since it holds tenant and subscription IDs
+    fd = os.open(env_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    # The mode above only applies to a new file; tighten an existing .env too
+    if hasattr(os, "fchmod"):
+        os.fchmod(fd, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as env_file:
+        env_file.write("\n".join(lines) + "\n")
     print(f"   ✅ Saved environment values to {env_path} (git-ignored)")
 
 
@@ -202,8 +252,7 @@ def collect_environment_variables():
 
 def main():
     """Main setup function."""
-    print("🚀 Microsoft Security Audit Suite Setup")
-    print("=" * 50)
+    print(BANNER)
     
     # Check Python version
     if sys.version_info < (3, 8):
@@ -213,21 +262,21 @@ def main():
     print(f"🐍 Python version: {sys.version.split()[0]} ✅")
     print("")
     
-    # Upgrade pip first
-    print("⬆️  Upgrading pip...")
-    success, _ = run_command("python -m pip install --upgrade pip")
-    if success:
-        print("   ✅ pip upgraded")
+    # Upgrade pip first, unless it is already recent enough
+    if pip_is_current():
+        print(f"⬆️  pip {version('pip')} is up to date ✅")
     else:
-        print("   ⚠️  pip upgrade failed, continuing anyway")
+        print("⬆️  Upgrading pip...")
+        success, _ = run_command([sys.executable, "-m", "pip", "install", "--upgrade", "pip"])
+        if success:
+            print("   ✅ pip upgraded")
+        else:
+            print("   ⚠️  pip upgrade failed, continuing anyway")
     print("")
     
     # Setup each component
-    components_success = []
-    
-    components_success.append(setup_sentinel_audit())
-    components_success.append(setup_soc_optimization())
-    components_success.append(setup_defender_xdr())
+    requirement_files = find_component_requirements()
+    components_success = install_component_requirements(requirement_files)
     
     print("")
     
@@ -239,11 +288,16 @@ def main():
 
     print("")
 
-    try:
-        run_env_wizard = input("Would you like to fill out the environment configuration now? [Y/n]: ").strip().lower()
-    except KeyboardInterrupt:
-        print("\n⚠️  Environment configuration skipped by user")
+    # No terminal to answer prompts (CI, piped stdin): never block on input()
+    if not sys.stdin.isatty():
+        print("ℹ️  Non-interactive session, skipping environment configuration wizard")
         run_env_wizard = "n"
+    else:
+        try:
+            run_env_wizard = input("Would you like to fill out the environment configuration now? [Y/n]: ").strip().lower()
+        except (KeyboardInterrupt, EOFError):
+            print("\n⚠️  Environment configuration skipped by user")
+            run_env_wizard = "n"
 
     if run_env_wizard in {"", "y", "yes"}:
         print("")
@@ -259,18 +313,10 @@ def main():
     
     if successful_components == total_components:
         print(f"✅ Setup completed successfully! ({successful_components}/{total_components})")
-        print("")
-        print("🎯 Next steps:")
-        print("   1. Set up your environment variables (see README.md)")
-        print("   2. Run individual audit scripts or use GitHub Actions")
-        print("   3. Test connectivity with the test scripts")
+        print(NEXT_STEPS)
     else:
         print(f"⚠️  Setup completed with issues ({successful_components}/{total_components})")
-        print("")
-        print("🔧 Troubleshooting:")
-        print("   1. Check that you have internet connectivity")
-        print("   2. Ensure pip is up to date")
-        print("   3. Try installing dependencies manually")
+        print(TROUBLESHOOTING)
     
     print("=" * 50)
 